@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Dict, Any, Optional
 from simulator.cpu import CPU
 import os
@@ -30,16 +30,28 @@ class CacheConfig(BaseModel):
     associativity: int
     access_time_ns: int
     policy: str = "LRU"
+    mshrs: int = 0
+    prefetcher: str = "none"
+    prefetch_degree: int = 1
+    prefetch_distance: int = 1
+    prefetch_queue: int = 8
 
 
 class MemoryConfig(BaseModel):
     size_kb: int
     access_time_ns: int
+    issue_interval_ns: int = 1
+
+
+class MetricsConfig(BaseModel):
+    window_size: int = 1000
+    max_windows: int = 256
 
 
 class SystemConfig(BaseModel):
     caches: List[CacheConfig]
     memory: MemoryConfig
+    metrics: MetricsConfig = MetricsConfig()
 
 
 class WorkloadRequest(BaseModel):
@@ -47,6 +59,35 @@ class WorkloadRequest(BaseModel):
     num_accesses: int
 
 
+class CacheOverride(BaseModel):
+    """Fields of CacheConfig that a comparison variant may change"""
+    model_config = ConfigDict(extra="forbid")
+    
+    size_kb: Optional[int] = None
+    line_size_bytes: Optional[int] = None
+    associativity: Optional[int] = None
+    access_time_ns: Optional[int] = None
+    policy: Optional[str] = None
+    mshrs: Optional[int] = None
+    prefetcher: Optional[str] = None
+    prefetch_degree: Optional[int] = None
+    prefetch_distance: Optional[int] = None
+    prefetch_queue: Optional[int] = None
+
+
+class PolicyVariant(BaseModel):
+    label: Optional[str] = None
+    policy: Optional[str] = None
+    overrides: Dict[str, Dict[str, Any]] = {}
+
+
+class CompareRequest(BaseModel):
+    pattern: str
+    num_accesses: int
+    variants: List[PolicyVariant] = []
+    windows: bool = False
+
+
 @app.get("/")
 def root():
     return {"message": "Cache Simulator API", "version": "1.0"}
@@ -78,6 +119,35 @@ def run_simulation(workload: WorkloadRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/compare")
+def compare_policies(request: CompareRequest):
+    """Run several configuration variants side by side over one access stream"""
+    if not cpu.config:
+        raise HTTPException(
+            status_code=400,
+            detail="System not configured. Please configure first."
+        )
+    
+    try:
+        # Overrides are validated here so bad fields are reported as a 400
+        variants = [
+            {
+                **variant.dict(),
+                "overrides": {
+                    level: CacheOverride(**values).dict(exclude_none=True)
+                    for level, values in variant.overrides.items()
+                }
+            }
+            for variant in request.variants
+        ]
+        comparison = cpu.compare_policies(request.pattern, request.num_accesses, variants, request.windows)
+        return {"status": "success", "comparison": comparison}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/reset")
 def reset_system():
     """Reset all statistics"""
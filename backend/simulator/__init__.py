@@ -2,5 +2,8 @@ from .cache import Cache
 from .memory import Memory
 from .cpu import CPU
 from .policies import LRU, FIFO, LFU
+from .metrics import WindowedMetrics
+from .prefetchers import NextLinePrefetcher, StridePrefetcher, StreamPrefetcher
 
-__all__ = ['Cache', 'Memory', 'CPU', 'LRU', 'FIFO', 'LFU']
\ No newline at end of file
+__all__ = ['Cache', 'Memory', 'CPU', 'LRU', 'FIFO', 'LFU', 'WindowedMetrics',
+           'NextLinePrefetcher', 'StridePrefetcher', 'StreamPrefetcher']
\ No newline at end of file
@@ -1,5 +1,6 @@
 from typing import Dict, List, Optional, Any
 from .policies import ReplacementPolicy, LRU, FIFO, LFU
+from .prefetchers import Prefetcher, NextLinePrefetcher, StridePrefetcher, StreamPrefetcher
 
 class CacheLine:
     def __init__(self, tag: int = -1, data: int = 0, valid: bool = False, dirty: bool = False):
@@ -7,9 +8,12 @@ class CacheLine:
         self.data = data
         self.valid = valid
         self.dirty = dirty
+        self.prefetched = False
 
 class Cache:
-    def __init__(self, name: str, size_kb: int, line_size_bytes: int, associativity: int, access_time_ns: int, policy: str = "LRU"):
+    def __init__(self, name: str, size_kb: int, line_size_bytes: int, associativity: int, access_time_ns: int, policy: str = "LRU", mshrs: int = 0,
+                 prefetcher: str = "none", prefetch_degree: int = 1, prefetch_distance: int = 1,
+                 prefetch_queue: int = 8):
         self.name = name
         self.size_kb = size_kb
         self.size_bytes = size_kb * 1024
@@ -38,6 +42,33 @@ class Cache:
         self.evictions = 0
         self.writebacks = 0
         self.next_level: Optional[Any] = None
+        
+        # Miss status holding registers; 0 keeps the cache blocking
+        if mshrs < 0:
+            raise ValueError("mshrs must be non-negative")
+        self.mshrs = mshrs
+        self.outstanding: Dict[int, int] = {}  # block address -> fill completion time
+        self.busy_until = 0
+        self.mshr_merges = 0
+        self.mshr_stall_cycles = 0
+        
+        self.prefetcher: Optional[Prefetcher] = None
+        pf = prefetcher.lower()
+        if pf == "next_line": self.prefetcher = NextLinePrefetcher(prefetch_degree, prefetch_distance)
+        elif pf == "stride": self.prefetcher = StridePrefetcher(prefetch_degree, prefetch_distance)
+        elif pf == "stream": self.prefetcher = StreamPrefetcher(prefetch_degree, prefetch_distance)
+        
+        # Prefetch fills in flight use their own queue, not the MSHRs
+        self.prefetch_queue = max(1, prefetch_queue)
+        self.prefetch_inflight: Dict[int, int] = {}  # block address -> fill completion time
+        
+        self.prefetches_issued = 0
+        self.prefetches_dropped = 0
+        self.prefetch_late = 0
+        self.prefetch_useful = 0
+        self.prefetch_unused = 0
+        self.prefetch_traffic = 0
+        self.prefetch_requests = 0  # prefetch fills requested by the level above
 
     def _get_set_and_tag(self, address: int) -> tuple[int, int]:
         block_address = address // self.line_size
@@ -56,32 +87,214 @@ class Cache:
             fetch_time += nxt_time
             events.extend(nxt_events)
         
-        # 2. Find victim
+        # 2-5. Evict victim and install new line
+        writeback, evict_events = self._replace(address, set_idx, tag)
+        events.extend(evict_events)
+        if writeback and self.next_level:
+            fetch_time += self.next_level.write(*writeback)
+        
+        return fetch_time, events
+
+    def _replace(self, address: int, set_idx: int, tag: int) -> tuple[Optional[tuple[int, int]], List[str]]:
+        """Evict a victim and install the new line, returning any (address, data) to write back"""
+        events = []
+        writeback = None
+        
+        # Find victim
         victim_way = self._find_victim(set_idx, self.sets[set_idx])
         victim_line = self.sets[set_idx][victim_way]
         
-        # 3. Handle Writeback (Dirty Victim)
+        # Handle Writeback (Dirty Victim)
         if victim_line.valid and victim_line.dirty:
             self.writebacks += 1
             events.append(f"{self.name} WRITEBACK from set {set_idx}")
-            if self.next_level:
-                # Correctly reconstruct the physical address for writeback
-                wb_address = (victim_line.tag * self.num_sets + set_idx) * self.line_size
-                fetch_time += self.next_level.write(wb_address, victim_line.data)
+            # Correctly reconstruct the physical address for writeback
+            wb_address = (victim_line.tag * self.num_sets + set_idx) * self.line_size
+            writeback = (wb_address, victim_line.data)
         
-        # 4. Eviction stats
+        # Eviction stats
         if victim_line.valid:
             self.evictions += 1
+            if victim_line.prefetched:
+                self.prefetch_unused += 1
             events.append(f"{self.name} EVICTION: Set {set_idx}, Way {victim_way}")
 
-        # 5. Install new line
+        # Install new line
         victim_line.valid = True
         victim_line.tag = tag
         victim_line.data = address 
         victim_line.dirty = False
+        victim_line.prefetched = False
         self.policies[set_idx].access(victim_way)
         
-        return fetch_time, events
+        return writeback, events
+
+    def _demand_hit(self, line: CacheLine) -> bool:
+        """Record a demand hit, returning True on first use of a prefetched line"""
+        if not line.prefetched:
+            return False
+        line.prefetched = False
+        self.prefetch_useful += 1
+        return True
+
+    def _prefetch_candidates(self, address: int, trigger: bool) -> List[int]:
+        """Train the prefetcher and return addresses of blocks not yet cached"""
+        candidates = []
+        for block in self.prefetcher.observe(address // self.line_size, trigger):
+            pf_address = block * self.line_size
+            set_idx, tag = self._get_set_and_tag(pf_address)
+            if not any(line.valid and line.tag == tag for line in self.sets[set_idx]):
+                candidates.append(pf_address)
+        return candidates
+
+    def _prefetch(self, address: int, trigger: bool, now: int) -> None:
+        """Issue prefetches at cycle `now` through the prefetch queue"""
+        for pf_address in self._prefetch_candidates(address, trigger):
+            if len(self.prefetch_inflight) >= self.prefetch_queue:
+                self.prefetches_dropped += 1
+                continue
+            
+            ready = now
+            if self.next_level:
+                _, ready = self.next_level.timed_access(pf_address, False, 0, now, "prefetch")
+            
+            set_idx, tag = self._get_set_and_tag(pf_address)
+            writeback, _ = self._replace(pf_address, set_idx, tag)
+            if writeback and self.next_level:
+                wb_address, wb_data = writeback
+                self.next_level.timed_access(wb_address, True, wb_data, now, "writeback")
+            for line in self.sets[set_idx]:
+                if line.valid and line.tag == tag:
+                    line.prefetched = True
+                    break
+            
+            self.prefetches_issued += 1
+            self.prefetch_traffic += 2 if writeback else 1
+            self.prefetch_inflight[pf_address // self.line_size] = ready
+
+    def _retire(self, now: int) -> None:
+        """Free MSHRs and prefetch queue entries whose fills have completed by `now`"""
+        if self.outstanding and min(self.outstanding.values()) <= now:
+            self.outstanding = {block: ready for block, ready in self.outstanding.items() if ready > now}
+        if self.prefetch_inflight and min(self.prefetch_inflight.values()) <= now:
+            self.prefetch_inflight = {block: ready for block, ready in self.prefetch_inflight.items() if ready > now}
+
+    def timed_access(self, address: int, is_write: bool, data: int, now: int,
+                     request: str = "demand") -> tuple[int, int]:
+        """
+        Perform an access issued at cycle `now` with overlapped miss handling.
+        
+        Misses occupy an MSHR until their fill completes instead of blocking
+        the cache; a later access to a line still being filled merges with
+        the outstanding miss. Requests stall only when every MSHR is busy.
+        With no MSHRs the cache blocks until each miss is serviced, and a
+        demand hit on a line whose prefetch is still in flight waits for it.
+        
+        A victim is written back in the same cycle its replacement is
+        requested from the next level. Writeback requests ("writeback") go
+        through a write buffer: they never take or wait for an MSHR, here
+        or at the levels their write-allocate fill reaches. A blocking
+        cache stays busy until both the fill and its writeback have been
+        serviced, one after the other.
+        
+        Prefetch fills from the level above ("prefetch") are counted in
+        prefetch_requests rather than hits and misses, do not train this
+        level's prefetcher and are carried by the requester's prefetch queue
+        instead of an MSHR here.
+        
+        Returns:
+            Tuple of (accept_time, ready_time)
+        """
+        demand = request == "demand"
+        prefetch = request == "prefetch"
+        now = max(now, self.busy_until)
+        self._retire(now)
+        set_idx, tag = self._get_set_and_tag(address)
+        block = address // self.line_size
+        lookup_done = now + self.access_time_ns
+        if prefetch:
+            self.prefetch_requests += 1
+        
+        for way_idx, line in enumerate(self.sets[set_idx]):
+            if line.valid and line.tag == tag:
+                if not prefetch:
+                    self.hits += 1
+                if is_write:
+                    line.data = data
+                    line.dirty = True
+                self.policies[set_idx].access(way_idx)
+                if not demand:
+                    return now, lookup_done
+                
+                trigger = self._demand_hit(line)
+                miss_fill = self.outstanding.get(block, 0)
+                prefetch_fill = self.prefetch_inflight.get(block, 0)
+                if miss_fill > lookup_done:
+                    self.mshr_merges += 1
+                elif trigger and prefetch_fill > lookup_done:
+                    self.prefetch_late += 1
+                ready = max(lookup_done, miss_fill, prefetch_fill)
+                if ready > lookup_done and not self.mshrs:
+                    self.busy_until = ready
+                if self.prefetcher:
+                    self._prefetch(address, trigger, lookup_done)
+                return now, ready
+        
+        if not prefetch:
+            self.misses += 1
+        if demand and self.mshrs and len(self.outstanding) >= self.mshrs:
+            free_at = min(self.outstanding.values())
+            self.mshr_stall_cycles += free_at - now
+            now = free_at
+            lookup_done = now + self.access_time_ns
+            self._retire(now)
+        
+        ready = lookup_done
+        if self.next_level:
+            # A missed writeback or prefetch fills with the same request type, so
+            # it never takes an MSHR or trains a prefetcher further down
+            _, ready = self.next_level.timed_access(address, False, 0, lookup_done, request)
+        
+        writeback, _ = self._replace(address, set_idx, tag)
+        wb_accept = wb_ready = ready
+        if writeback and self.next_level:
+            wb_address, wb_data = writeback
+            wb_accept, wb_ready = self.next_level.timed_access(wb_address, True, wb_data, lookup_done, "writeback")
+        
+        if is_write:
+            line = next(l for l in self.sets[set_idx] if l.valid and l.tag == tag)
+            line.data = data
+            line.dirty = True
+        
+        if not self.mshrs:
+            # The writeback is serviced after the fill, as in the serial model
+            self.busy_until = max(ready, wb_accept) + (wb_ready - wb_accept)
+        elif demand:
+            self.outstanding[block] = ready
+        
+        if demand and self.prefetcher:
+            self._prefetch(address, True, lookup_done)
+        
+        return now, ready
+
+    def access(self, address: int, is_write: bool, data: int, set_idx: int, tag: int) -> int:
+        """Serial read or write with the set and tag already decoded and no event log"""
+        for way_idx, line in enumerate(self.sets[set_idx]):
+            if line.valid and line.tag == tag:
+                self.hits += 1
+                if is_write:
+                    line.data = data
+                    line.dirty = True
+                self.policies[set_idx].access(way_idx)
+                return self.access_time_ns
+        
+        self.misses += 1
+        fetch_time, _ = self._handle_miss(address, set_idx, tag)
+        if is_write:
+            line = next(l for l in self.sets[set_idx] if l.valid and l.tag == tag)
+            line.data = data
+            line.dirty = True
+        return self.access_time_ns + fetch_time
 
     def read(self, address: int) -> tuple[bool, int, List[str]]:
         set_idx, tag = self._get_set_and_tag(address)
@@ -131,19 +344,49 @@ class Cache:
 
     def get_stats(self) -> Dict:
         total = self.hits + self.misses
-        return {
+        stats = {
             "name": self.name,
             "hits": self.hits,
             "misses": self.misses,
             "hit_rate": round((self.hits / total * 100), 2) if total > 0 else 0,
             "evictions": self.evictions,
-            "writebacks": self.writebacks
+            "writebacks": self.writebacks,
+            "mshrs": self.mshrs,
+            "mshr_merges": self.mshr_merges,
+            "mshr_stall_cycles": self.mshr_stall_cycles,
+            "prefetch_requests": self.prefetch_requests
         }
+        
+        if self.prefetcher:
+            issued = self.prefetches_issued
+            covered = self.prefetch_useful + self.misses
+            stats["prefetch"] = {
+                "type": self.prefetcher.name,
+                "degree": self.prefetcher.degree,
+                "distance": self.prefetcher.distance,
+                "queue": self.prefetch_queue,
+                "issued": issued,
+                "dropped": self.prefetches_dropped,
+                "useful": self.prefetch_useful,
+                "late": self.prefetch_late,
+                "unused_evicted": self.prefetch_unused,
+                "accuracy": round((self.prefetch_useful / issued * 100), 2) if issued > 0 else 0,
+                "coverage": round((self.prefetch_useful / covered * 100), 2) if covered > 0 else 0,
+                "traffic": self.prefetch_traffic
+            }
+        
+        return stats
 
     def reset(self) -> None:
         self.hits = self.misses = self.evictions = self.writebacks = 0
+        self.mshr_merges = self.mshr_stall_cycles = self.busy_until = 0
+        self.prefetches_issued = self.prefetches_dropped = self.prefetch_late = 0
+        self.prefetch_useful = self.prefetch_unused = self.prefetch_traffic = self.prefetch_requests = 0
+        self.outstanding.clear()
+        self.prefetch_inflight.clear()
         for s in self.sets:
             for l in s:
-                l.valid = l.dirty = False
+                l.valid = l.dirty = l.prefetched = False
                 l.tag = -1
-        for p in self.policies: p.reset()
\ No newline at end of file
+        for p in self.policies: p.reset()
+        if self.prefetcher: self.prefetcher.reset()
\ No newline at end of file
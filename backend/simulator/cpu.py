@@ -1,8 +1,14 @@
 from typing import List, Dict, Optional, Any
 from .cache import Cache
 from .memory import Memory
+from .metrics import WindowedMetrics
+from .prefetchers import PREFETCHERS
+import copy
+import json
 import random
 
+REPLACEMENT_POLICIES = ["LRU", "FIFO", "LFU"]
+
 
 class CPU:
     """Simulates CPU with cache hierarchy"""
@@ -11,23 +17,34 @@ class CPU:
         self.caches: List[Cache] = []
         self.memory: Optional[Memory] = None
         self.total_cycles = 0
+        self.total_latency = 0
         self.instruction_count = 0
         self.wait_cycles = 0
         self.execution_log: List[Dict[str, Any]] = []
+        self.config: Dict[str, Any] = {}
+        self.metrics: Optional[WindowedMetrics] = None
+        self.event_driven = False
+        self.clock = 0
+        self.drain_time = 0
     
     def configure(self, config: Dict[str, Any]) -> None:
         """Configure CPU with cache hierarchy"""
         self.caches = []
         self.total_cycles = 0
+        self.total_latency = 0
         self.instruction_count = 0
         self.wait_cycles = 0
         self.execution_log = []
+        self.clock = 0
+        self.drain_time = 0
+        self.config = copy.deepcopy(config)
         
         # Create memory
         mem_config = config.get("memory", {})
         self.memory = Memory(
             size_kb=mem_config.get("size_kb", 1024),
-            access_time_ns=mem_config.get("access_time_ns", 100)
+            access_time_ns=mem_config.get("access_time_ns", 100),
+            issue_interval_ns=mem_config.get("issue_interval_ns", 1)
         )
         
         # Create cache hierarchy
@@ -41,7 +58,12 @@ class CPU:
                 line_size_bytes=cache_config.get("line_size_bytes", 64),
                 associativity=cache_config["associativity"],
                 access_time_ns=cache_config["access_time_ns"],
-                policy=cache_config.get("policy", "LRU")
+                policy=cache_config.get("policy", "LRU"),
+                mshrs=cache_config.get("mshrs", 0),
+                prefetcher=cache_config.get("prefetcher", "none"),
+                prefetch_degree=cache_config.get("prefetch_degree", 1),
+                prefetch_distance=cache_config.get("prefetch_distance", 1),
+                prefetch_queue=cache_config.get("prefetch_queue", 8)
             )
             
             if prev_cache:
@@ -53,6 +75,18 @@ class CPU:
         # Connect last cache to memory
         if prev_cache and self.memory:
             prev_cache.next_level = self.memory
+        
+        # Overlap misses and prefetch fills with an event-driven timing model
+        # when any level has MSHRs or a prefetcher
+        self.event_driven = any(cache.mshrs or cache.prefetcher for cache in self.caches)
+        
+        # Per-window time series
+        metrics_config = config.get("metrics") or {}
+        self.metrics = WindowedMetrics(
+            level_names=[cache.name for cache in self.caches],
+            window_size=metrics_config.get("window_size", 1000),
+            max_windows=metrics_config.get("max_windows", 256)
+        )
     
     def execute_workload(self, workload_type: str, num_accesses: int) -> Dict[str, Any]:
         """
@@ -66,33 +100,209 @@ class CPU:
             Execution statistics
         """
         self.execution_log = []
-        addresses = self._generate_access_pattern(workload_type, num_accesses)
+        operations = self._generate_operations(workload_type, num_accesses)
+        log_interval = max(1, num_accesses // 100)
         
-        for i, address in enumerate(addresses):
-            is_write = random.random() < 0.3  # 30% writes
+        for i, (address, is_write, data) in enumerate(operations):
+            self._execute_operation(i, address, is_write, data, log_interval)
+        
+        self._drain()
+        return self.get_stats()
+    
+    def compare_policies(self, workload_type: str, num_accesses: int,
+                         variants: Optional[List[Dict[str, Any]]] = None,
+                         windows: bool = False) -> Dict[str, Any]:
+        """
+        Run several shadow hierarchies over one shared access stream
+        
+        Every variant starts from the current configuration and only changes
+        what it overrides, so differences in the results come from the
+        configuration rather than from a differently randomized workload.
+        The current CPU state is left untouched.
+        
+        Args:
+            workload_type: Type of memory access pattern
+            num_accesses: Number of memory accesses to simulate
+            variants: List of dicts with an optional "label", an optional
+                "policy" applied to every cache level, and optional
+                "overrides" mapping a cache name to parameter overrides.
+                Defaults to one variant per replacement policy.
+            windows: Also collect per-window metrics for every variant
             
-            if is_write:
-                access_time = self._write_memory(address, random.randint(0, 255))
-                operation = "WRITE"
-            else:
-                access_time = self._read_memory(address)
-                operation = "READ"
+        Returns:
+            Per-variant statistics, in the order the variants were given
+        """
+        if not self.config:
+            raise ValueError("System not configured. Please configure first.")
+        
+        if not variants:
+            variants = [{"policy": policy} for policy in REPLACEMENT_POLICIES]
+        
+        # Variants that resolve to the same configuration share one shadow
+        shadows: List[CPU] = []
+        by_config: Dict[str, CPU] = {}
+        variant_shadows: List[CPU] = []
+        labels: List[str] = []
+        for index, variant in enumerate(variants):
+            config = self._variant_config(variant)
+            key = json.dumps(config, sort_keys=True)
+            if key not in by_config:
+                shadow = CPU()
+                shadow.configure(config)
+                if not windows:
+                    shadow.metrics = None
+                by_config[key] = shadow
+                shadows.append(shadow)
+            variant_shadows.append(by_config[key])
+            labels.append(variant.get("label") or variant.get("policy") or f"variant-{index + 1}")
+        
+        operations = self._generate_operations(workload_type, num_accesses)
+        
+        # Serial shadows without windows only need their cycle totals, so
+        # they run in lockstep: each access is decoded once per L1 geometry
+        # and goes straight to every L1, skipping the per-access dispatch
+        lockstep = [s for s in shadows if not s.event_driven and not s.metrics and s.caches]
+        for shadow in shadows:
+            if shadow not in lockstep:
+                execute = shadow._execute_operation
+                for i, (address, is_write, data) in enumerate(operations):
+                    execute(i, address, is_write, data, 0)
+                shadow._drain()
+        if lockstep:
+            self._replay_lockstep(lockstep, operations)
+        
+        results = []
+        for label, shadow in zip(labels, variant_shadows):
+            stats = shadow.get_stats()
+            stats.pop("execution_log", None)
+            if not windows:
+                stats.pop("windows", None)
+            results.append({"label": label, "stats": stats})
+        
+        return {
+            "pattern": workload_type,
+            "num_accesses": num_accesses,
+            "results": results
+        }
+    
+    @staticmethod
+    def _replay_lockstep(shadows: List["CPU"], operations: List[tuple[int, bool, int]]) -> None:
+        """Replay the stream on serial shadows together, decoding each access once per L1 geometry"""
+        groups: Dict[tuple[int, int], List[CPU]] = {}
+        for shadow in shadows:
+            l1 = shadow.caches[0]
+            groups.setdefault((l1.line_size, l1.num_sets), []).append(shadow)
+        
+        for (line_size, num_sets), group in groups.items():
+            accesses = [shadow.caches[0].access for shadow in group]
+            cycles = [0] * len(group)
+            for address, is_write, data in operations:
+                tag, set_idx = divmod(address // line_size, num_sets)
+                for i, access in enumerate(accesses):
+                    cycles[i] += access(address, is_write, data, set_idx, tag)
             
-            self.instruction_count += 1
-            self.total_cycles += access_time
-            self.wait_cycles += access_time - 1  # Assume 1 cycle for computation
+            for shadow, total in zip(group, cycles):
+                shadow.instruction_count += len(operations)
+                shadow.total_cycles += total
+                shadow.total_latency += total
+                shadow.wait_cycles += total - len(operations)
+    
+    def _variant_config(self, variant: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a configuration from the current one with variant overrides applied"""
+        config = copy.deepcopy(self.config)
+        policy = variant.get("policy")
+        overrides = variant.get("overrides") or {}
+        
+        known = {cache_config["name"] for cache_config in config.get("caches", [])}
+        unknown = set(overrides) - known
+        if unknown:
+            raise ValueError(f"Unknown cache level(s) in overrides: {', '.join(sorted(unknown))}")
+        
+        for cache_config in config.get("caches", []):
+            if policy:
+                cache_config["policy"] = policy
+            cache_config.update(overrides.get(cache_config["name"], {}))
             
-            # Log every Nth access to avoid too much data
-            if i % max(1, num_accesses // 100) == 0:
-                self.execution_log.append({
-                    "instruction": i,
-                    "operation": operation,
-                    "address": f"0x{address:X}",
-                    "access_time_ns": access_time,
-                    "cumulative_cycles": self.total_cycles
-                })
+            # Cache falls back to LRU / no prefetcher for unknown names, which
+            # would mislabel the variant, so reject them here instead
+            if cache_config.get("policy", "LRU").upper() not in REPLACEMENT_POLICIES:
+                raise ValueError(f"Unknown replacement policy: {cache_config['policy']}")
+            if cache_config.get("prefetcher", "none").lower() not in PREFETCHERS:
+                raise ValueError(f"Unknown prefetcher: {cache_config['prefetcher']}")
         
-        return self.get_stats()
+        return config
+    
+    def _generate_operations(self, workload_type: str, count: int) -> List[tuple[int, bool, int]]:
+        """Generate (address, is_write, data) tuples for a workload"""
+        operations = []
+        for address in self._generate_access_pattern(workload_type, count):
+            is_write = random.random() < 0.3  # 30% writes
+            data = random.randint(0, 255) if is_write else 0
+            operations.append((address, is_write, data))
+        return operations
+    
+    def _execute_operation(self, index: int, address: int, is_write: bool, data: int,
+                           log_interval: int) -> int:
+        """Perform a single access and update cycle counters and the log (0 disables logging)"""
+        if self.event_driven:
+            access_time, cycles = self._timed_access(address, is_write, data)
+        elif is_write:
+            access_time = cycles = self._write_memory(address, data)
+        else:
+            access_time = cycles = self._read_memory(address)
+        
+        self.instruction_count += 1
+        self.total_cycles += cycles
+        self.total_latency += access_time
+        self.wait_cycles += cycles - 1  # Assume 1 cycle for computation
+        
+        if self.metrics:
+            self.metrics.record(access_time, cycles, self.caches)
+        
+        # Log every Nth access to avoid too much data
+        if log_interval and index % log_interval == 0:
+            self.execution_log.append({
+                "instruction": index,
+                "operation": "WRITE" if is_write else "READ",
+                "address": f"0x{address:X}",
+                "access_time_ns": access_time,
+                "cumulative_cycles": self.total_cycles
+            })
+        
+        return access_time
+    
+    def _timed_access(self, address: int, is_write: bool, data: int) -> tuple[int, int]:
+        """
+        Issue an access at the current clock without waiting for miss data
+        
+        The CPU moves on once L1 has accepted the request and finished its
+        lookup, so independent misses overlap. It stalls only while a
+        blocking cache is busy or every MSHR on the path is occupied.
+        A blocking L1 stalls the CPU until the access, including a late
+        prefetch it merged with, has completed, as in the serial model.
+        
+        Returns:
+            Tuple of (access latency, cycles the CPU advanced)
+        """
+        l1 = self.caches[0]
+        issue = self.clock
+        accept, ready = l1.timed_access(address, is_write, data, issue)
+        if l1.mshrs:
+            self.clock = accept + l1.access_time_ns
+            self.drain_time = max(self.drain_time, ready)
+            return ready - issue, self.clock - issue
+        
+        self.clock = max(ready, l1.busy_until)
+        return self.clock - issue, self.clock - issue
+    
+    def _drain(self) -> None:
+        """Wait for outstanding misses so total cycles cover every fill"""
+        if self.event_driven and self.drain_time > self.clock:
+            self.total_cycles += self.drain_time - self.clock
+            self.wait_cycles += self.drain_time - self.clock
+            if self.metrics:
+                self.metrics.add_cycles(self.drain_time - self.clock)
+            self.clock = self.drain_time
     
     def _generate_access_pattern(self, pattern_type: str, count: int) -> List[int]:
         """Generate memory access pattern"""
@@ -156,13 +366,15 @@ class CPU:
         cache_stats = [cache.get_stats() for cache in self.caches]
         memory_stats = self.memory.get_stats() if self.memory else {}
         
-        # Calculate effective access time and speedup
-        avg_access_time = self.total_cycles / max(1, self.instruction_count)
+        # Calculate effective access time and speedup; with overlapped misses
+        # the latency of an access can exceed the cycles the CPU spent on it
+        avg_access_time = self.total_latency / max(1, self.instruction_count)
         memory_only_time = self.instruction_count * (memory_stats.get("access_time_ns", 100) if self.memory else 100)
         speedup = memory_only_time / max(1, self.total_cycles)
         
-        # Calculate CPI (Cycles Per Instruction)
+        # Calculate CPI (Cycles Per Instruction) and its inverse throughput
         cpi = self.total_cycles / max(1, self.instruction_count)
+        ipc = self.instruction_count / max(1, self.total_cycles)
         
         return {
             "instruction_count": self.instruction_count,
@@ -170,21 +382,29 @@ class CPU:
             "wait_cycles": self.wait_cycles,
             "avg_access_time_ns": round(avg_access_time, 2),
             "cpi": round(cpi, 2),
+            "ipc": round(ipc, 3),
             "speedup": round(speedup, 2),
             "caches": cache_stats,
             "memory": memory_stats,
+            "windows": self.metrics.get_stats(self.caches) if self.metrics else {},
             "execution_log": self.execution_log[-50:]  # Return last 50 entries
         }
     
     def reset(self) -> None:
         """Reset CPU and all caches"""
         self.total_cycles = 0
+        self.total_latency = 0
         self.instruction_count = 0
         self.wait_cycles = 0
         self.execution_log = []
+        self.clock = 0
+        self.drain_time = 0
         
         for cache in self.caches:
             cache.reset()
         
         if self.memory:
-            self.memory.reset()
\ No newline at end of file
+            self.memory.reset()
+        
+        if self.metrics:
+            self.metrics.reset()
\ No newline at end of file
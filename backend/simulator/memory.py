@@ -5,19 +5,25 @@ import random
 class Memory:
     """Simulates main memory (RAM)"""
     
-    def __init__(self, size_kb: int = 1024, access_time_ns: int = 100):
+    def __init__(self, size_kb: int = 1024, access_time_ns: int = 100, issue_interval_ns: int = 1):
         """
         Initialize memory
         
         Args:
             size_kb: Size of memory in kilobytes
             access_time_ns: Access latency in nanoseconds
+            issue_interval_ns: Minimum time between two accepted requests,
+                which limits bandwidth in the event-driven timing model
         """
         self.size_kb = size_kb
         self.size_bytes = size_kb * 1024
         self.access_time_ns = access_time_ns
+        self.issue_interval_ns = max(1, issue_interval_ns)
         self.data: Dict[int, int] = {}
         self.access_count = 0
+        self.prefetch_accesses = 0
+        self.next_issue = 0
+        self.queue_cycles = 0
         
         # Initialize with some random data
         self._initialize_data()
@@ -67,15 +73,46 @@ class Memory:
         self.data[block_address] = data
         return self.access_time_ns
     
+    def timed_access(self, address: int, is_write: bool, data: int, now: int,
+                     request: str = "demand") -> tuple[int, int]:
+        """
+        Perform an access issued at cycle `now`
+        
+        Memory accepts one request every `issue_interval_ns`; requests
+        arriving sooner queue for the next slot. Accepted requests are
+        serviced in parallel, so overlapping misses share the latency but
+        not the bandwidth. Prefetch fills ("prefetch") are counted in
+        prefetch_accesses instead of total_accesses.
+        
+        Returns:
+            Tuple of (accept_time, ready_time)
+        """
+        if request == "prefetch":
+            self.prefetch_accesses += 1
+        elif is_write:
+            self.write(address, data)
+        else:
+            self.read(address)
+        accept = max(now, self.next_issue)
+        self.queue_cycles += accept - now
+        self.next_issue = accept + self.issue_interval_ns
+        return accept, accept + self.access_time_ns
+    
     def get_stats(self) -> Dict:
         """Get memory statistics"""
         return {
             "size_kb": self.size_kb,
             "access_time_ns": self.access_time_ns,
+            "issue_interval_ns": self.issue_interval_ns,
             "total_accesses": self.access_count,
+            "prefetch_accesses": self.prefetch_accesses,
+            "queue_cycles": self.queue_cycles,
             "blocks_used": len(self.data)
         }
     
     def reset(self) -> None:
         """Reset memory statistics"""
-        self.access_count = 0
\ No newline at end of file
+        self.access_count = 0
+        self.prefetch_accesses = 0
+        self.next_issue = 0
+        self.queue_cycles = 0
\ No newline at end of file
@@ -0,0 +1,132 @@
+from typing import Dict, List, Any
+import numpy as np
+
+
+COUNTERS = ("hits", "misses", "evictions", "writebacks")
+
+
+class WindowedMetrics:
+    """Per-window counters for each cache level using bounded memory"""
+
+    def __init__(self, level_names: List[str], window_size: int = 1000, max_windows: int = 256):
+        """
+        Initialize windowed metrics
+
+        Args:
+            level_names: Names of the cache levels being tracked
+            window_size: Number of accesses per window
+            max_windows: Number of windows kept before adjacent windows are merged
+        """
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+        if max_windows < 2 or max_windows % 2:
+            raise ValueError("max_windows must be an even number of at least 2")
+
+        self.level_names = list(level_names)
+        self.initial_window_size = window_size
+        self.max_windows = max_windows
+
+        num_levels = len(self.level_names)
+        self.counters = np.zeros((len(COUNTERS), max_windows, num_levels), dtype=np.int64)
+        self.accesses = np.zeros(max_windows, dtype=np.int64)
+        self.access_time = np.zeros(max_windows, dtype=np.int64)
+        self.cycles = np.zeros(max_windows, dtype=np.int64)
+
+        self.reset()
+
+    def record(self, access_time: int, cycles: int, caches: List[Any]) -> None:
+        """Account one access and close the current window once it is full"""
+        self._pending_accesses += 1
+        self._pending_time += access_time
+        self._pending_cycles += cycles
+
+        if self._pending_accesses >= self.window_size:
+            self._close_window(caches)
+
+    def add_cycles(self, cycles: int) -> None:
+        """Account stall cycles that belong to no access, such as the final drain"""
+        if self._pending_accesses or not self.count:
+            self._pending_cycles += cycles
+        else:
+            # The pending window is empty and would not be reported
+            self.cycles[self.count - 1] += cycles
+
+    def _snapshot(self, caches: List[Any]) -> np.ndarray:
+        """Current cumulative counters of every level, shaped (counter, level)"""
+        return np.array(
+            [[getattr(cache, name) for cache in caches] for name in COUNTERS],
+            dtype=np.int64
+        ).reshape(len(COUNTERS), len(self.level_names))
+
+    def _close_window(self, caches: List[Any]) -> None:
+        """Store the pending window and downsample if the arrays are full"""
+        snapshot = self._snapshot(caches)
+        self.counters[:, self.count, :] = snapshot - self._last_snapshot
+        self.accesses[self.count] = self._pending_accesses
+        self.access_time[self.count] = self._pending_time
+        self.cycles[self.count] = self._pending_cycles
+        self.count += 1
+
+        self._last_snapshot = snapshot
+        self._pending_accesses = 0
+        self._pending_time = 0
+        self._pending_cycles = 0
+
+        if self.count == self.max_windows:
+            self._downsample()
+
+    def _downsample(self) -> None:
+        """Merge adjacent window pairs in place, doubling the window size"""
+        half = self.max_windows // 2
+        self.counters[:, :half, :] = self.counters[:, 0::2, :] + self.counters[:, 1::2, :]
+        self.counters[:, half:, :] = 0
+        for array in (self.accesses, self.access_time, self.cycles):
+            array[:half] = array[0::2] + array[1::2]
+            array[half:] = 0
+        self.count = half
+        self.window_size *= 2
+
+    def get_stats(self, caches: List[Any]) -> Dict[str, Any]:
+        """Get per-window statistics, including the partially filled window"""
+        counters = self.counters[:, :self.count, :]
+        accesses = self.accesses[:self.count]
+        access_time = self.access_time[:self.count]
+        cycles = self.cycles[:self.count]
+
+        if self._pending_accesses:
+            pending = (self._snapshot(caches) - self._last_snapshot)[:, np.newaxis, :]
+            counters = np.concatenate([counters, pending], axis=1)
+            accesses = np.append(accesses, self._pending_accesses)
+            access_time = np.append(access_time, self._pending_time)
+            cycles = np.append(cycles, self._pending_cycles)
+
+        avg_access_time = np.round(access_time / np.maximum(accesses, 1), 2)
+        cpi = np.round(cycles / np.maximum(accesses, 1), 2)
+
+        return {
+            "window_size": self.window_size,
+            "count": int(accesses.size),
+            "accesses": accesses.tolist(),
+            "avg_access_time_ns": avg_access_time.tolist(),
+            "cpi": cpi.tolist(),
+            "levels": [
+                {
+                    "name": name,
+                    **{counter: counters[c, :, level].tolist() for c, counter in enumerate(COUNTERS)}
+                }
+                for level, name in enumerate(self.level_names)
+            ]
+        }
+
+    def reset(self) -> None:
+        """Clear all windows and restore the initial window size"""
+        self.counters.fill(0)
+        self.accesses.fill(0)
+        self.access_time.fill(0)
+        self.cycles.fill(0)
+        self.window_size = self.initial_window_size
+        self.count = 0
+        self._pending_accesses = 0
+        self._pending_time = 0
+        self._pending_cycles = 0
+        self._last_snapshot = np.zeros((len(COUNTERS), len(self.level_names)), dtype=np.int64)
@@ -0,0 +1,138 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict
+
+
+PREFETCHERS = ("none", "next_line", "stride", "stream")
+
+
+class Prefetcher(ABC):
+    """Abstract base class for hardware prefetchers working on block addresses"""
+
+    name = "none"
+
+    def __init__(self, degree: int = 1, distance: int = 1):
+        """
+        Initialize prefetcher
+
+        Args:
+            degree: Number of blocks requested per trigger
+            distance: How many blocks ahead of the trigger the first request is
+        """
+        self.degree = max(1, degree)
+        self.distance = max(1, distance)
+
+    @abstractmethod
+    def observe(self, block: int, trigger: bool) -> List[int]:
+        """
+        Record a demand access and return the blocks to prefetch
+
+        Args:
+            block: Block address of the demand access
+            trigger: True on a miss or the first use of a prefetched line
+        """
+        pass
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Reset the prefetcher state"""
+        pass
+
+    def _ahead(self, block: int, step: int) -> List[int]:
+        """Blocks `distance` to `distance + degree - 1` steps past `block`"""
+        return [
+            block + step * (self.distance + i)
+            for i in range(self.degree)
+            if block + step * (self.distance + i) >= 0
+        ]
+
+
+class NextLinePrefetcher(Prefetcher):
+    """Prefetch the following blocks on every trigger"""
+
+    name = "next_line"
+
+    def observe(self, block: int, trigger: bool) -> List[int]:
+        """Request sequential blocks after a miss or prefetch hit"""
+        return self._ahead(block, 1) if trigger else []
+
+    def reset(self) -> None:
+        """Nothing to reset"""
+        pass
+
+
+class StridePrefetcher(Prefetcher):
+    """Detect a constant block delta between accesses (no PC)"""
+
+    name = "stride"
+
+    def __init__(self, degree: int = 1, distance: int = 1):
+        super().__init__(degree, distance)
+        self.last_block = None
+        self.last_delta = 0
+        self.confidence = 0
+
+    def observe(self, block: int, trigger: bool) -> List[int]:
+        """Request blocks along the stride once it has been seen twice"""
+        if self.last_block is None:
+            self.last_block = block
+            return []
+
+        delta = block - self.last_block
+        if delta == 0:
+            return []
+
+        if delta == self.last_delta:
+            self.confidence += 1
+        else:
+            self.confidence = 0
+            self.last_delta = delta
+        self.last_block = block
+
+        return self._ahead(block, delta) if self.confidence >= 1 else []
+
+    def reset(self) -> None:
+        """Reset stride detection"""
+        self.last_block = None
+        self.last_delta = 0
+        self.confidence = 0
+
+
+class StreamPrefetcher(Prefetcher):
+    """Track several ascending or descending miss streams"""
+
+    name = "stream"
+
+    def __init__(self, degree: int = 1, distance: int = 1, max_streams: int = 8, window: int = 16):
+        super().__init__(degree, distance)
+        self.max_streams = max_streams
+        self.window = window
+        self.streams: List[Dict[str, int]] = []  # most recently used last
+
+    def observe(self, block: int, trigger: bool) -> List[int]:
+        """Allocate or advance a stream on each trigger"""
+        if not trigger:
+            return []
+
+        for stream in self.streams:
+            delta = block - stream["last"]
+            if delta == 0 or abs(delta) > self.window:
+                continue
+
+            direction = 1 if delta > 0 else -1
+            self.streams.remove(stream)
+            self.streams.append(stream)
+            stream["last"] = block
+
+            # A reversed stream has to be confirmed again before prefetching
+            confirmed = stream["direction"] in (0, direction)
+            stream["direction"] = direction
+            return self._ahead(block, direction) if confirmed else []
+
+        if len(self.streams) >= self.max_streams:
+            self.streams.pop(0)
+        self.streams.append({"last": block, "direction": 0})
+        return []
+
+    def reset(self) -> None:
+        """Drop all tracked streams"""
+        self.streams.clear()
@@ -5,16 +5,43 @@ export interface CacheConfig {
     associativity: number;
     access_time_ns: number;
     policy: string;
+    mshrs?: number;
+    prefetcher?: string;
+    prefetch_degree?: number;
+    prefetch_distance?: number;
+    prefetch_queue?: number;
 }
 
 export interface MemoryConfig {
     size_kb: number;
     access_time_ns: number;
+    issue_interval_ns?: number;
+}
+
+export interface MetricsConfig {
+    window_size: number;
+    max_windows: number;
 }
 
 export interface SystemConfig {
     caches: CacheConfig[];
     memory: MemoryConfig;
+    metrics?: MetricsConfig;
+}
+
+export interface PrefetchStats {
+    type: string;
+    degree: number;
+    distance: number;
+    queue: number;
+    issued: number;
+    dropped: number;
+    useful: number;
+    late: number;
+    unused_evicted: number;
+    accuracy: number;
+    coverage: number;
+    traffic: number;
 }
 
 export interface CacheStats {
@@ -31,12 +58,20 @@ export interface CacheStats {
     evictions: number;
     writebacks: number;
     total_accesses: number;
+    mshrs: number;
+    mshr_merges: number;
+    mshr_stall_cycles: number;
+    prefetch_requests: number;
+    prefetch?: PrefetchStats;
 }
 
 export interface MemoryStats {
     size_kb: number;
     access_time_ns: number;
+    issue_interval_ns: number;
     total_accesses: number;
+    prefetch_accesses: number;
+    queue_cycles: number;
     blocks_used: number;
 }
 
@@ -48,15 +83,34 @@ export interface ExecutionLog {
     cumulative_cycles: number;
 }
 
+export interface LevelWindows {
+    name: string;
+    hits: number[];
+    misses: number[];
+    evictions: number[];
+    writebacks: number[];
+}
+
+export interface WindowedMetrics {
+    window_size: number;
+    count: number;
+    accesses: number[];
+    avg_access_time_ns: number[];
+    cpi: number[];
+    levels: LevelWindows[];
+}
+
 export interface SimulationStats {
     instruction_count: number;
     total_cycles: number;
     wait_cycles: number;
     avg_access_time_ns: number;
     cpi: number;
+    ipc: number;
     speedup: number;
     caches: CacheStats[];
     memory: MemoryStats;
+    windows: WindowedMetrics;
     execution_log: ExecutionLog[];
 }
 
@@ -69,4 +123,28 @@ export interface Preset {
     name: string;
     description: string;
     config: SystemConfig;
-}
\ No newline at end of file
+}
+
+export interface PolicyVariant {
+    label?: string;
+    policy?: string;
+    overrides?: Record<string, Partial<Omit<CacheConfig, 'name'>>>;
+}
+
+export interface CompareRequest {
+    pattern: string;
+    num_accesses: number;
+    variants: PolicyVariant[];
+    windows?: boolean;
+}
+
+export interface ComparisonResult {
+    label: string;
+    stats: Omit<SimulationStats, 'execution_log' | 'windows'> & { windows?: WindowedMetrics };
+}
+
+export interface Comparison {
+    pattern: string;
+    num_accesses: number;
+    results: ComparisonResult[];
+}
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { SystemConfig, WorkloadRequest, SimulationStats, Preset } from '@/types';
+import { SystemConfig, WorkloadRequest, SimulationStats, Preset, CompareRequest, Comparison } from '@/types';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
@@ -20,6 +20,11 @@ export const runSimulation = async (workload: WorkloadRequest): Promise<{ status
     return response.data;
 };
 
+export const comparePolicies = async (request: CompareRequest): Promise<{ status: string; comparison: Comparison }> => {
+    const response = await api.post('/compare', request);
+    return response.data;
+};
+
 export const resetSystem = async (): Promise<{ status: string; message: string }> => {
     const response = await api.post('/reset');
     return response.data;